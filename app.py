@@ -3,12 +3,66 @@ import sqlite3
 from datetime import datetime
 import pandas as pd
 from io import BytesIO
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:  # 可选依赖：未安装时回退到标准库json
+    orjson = None
 
 app = Flask(__name__)
 
+DB_PATH = 'fcra_data.db'
+
+# 小于该字节数的响应不压缩（压缩收益抵不过CPU开销）
+COMPRESS_MIN_SIZE = 1024
+
+# portfolio_data 的列顺序（与行格式中的键一致）
+PORTFOLIO_DATA_COLUMNS = [
+    'id', 'acct_number', 'portfolio', 'rule_id', 'rule_category', 'severity',
+    'dqs_status', 'date_of_info', 'aging', 'process_date', 'remediation_status',
+    'action_taken_by', 'action_notes', 'action_date', 'assigned_to', 'remediation_category'
+]
+
+# 取值重复度高的分类列，在列式格式中做字典编码
+CATEGORICAL_COLUMNS = {
+    'portfolio', 'rule_id', 'rule_category', 'severity', 'dqs_status',
+    'remediation_status', 'action_taken_by', 'assigned_to', 'remediation_category'
+}
+
+# 透视接口允许的分组/过滤维度（列名白名单，SQL中只拼接这些名字）
+PIVOT_DIMENSIONS = [
+    'portfolio', 'rule_id', 'rule_category', 'severity', 'dqs_status',
+    'remediation_status', 'remediation_category', 'assigned_to'
+]
+
+# 透视接口的度量，口径与 summary_table 一致
+PIVOT_MEASURES = {
+    'count': 'COUNT(*)',
+    'exceptions': "SUM(CASE WHEN remediation_status <> 'Nonexceptions' THEN 1 ELSE 0 END)",
+    'incomplete': "SUM(CASE WHEN remediation_status = 'Incomplete' THEN 1 ELSE 0 END)",
+    'ninety_days': "SUM(CASE WHEN remediation_status = 'Incomplete' AND CAST(aging AS INTEGER) >= 90 THEN 1 ELSE 0 END)"
+}
+
+PIVOT_MAX_DIMENSIONS = 3
+PIVOT_DEFAULT_LIMIT = 500
+PIVOT_MAX_LIMIT = 5000
+PIVOT_TIMEOUT_SECONDS = 2.0
+PIVOT_CACHE_SIZE = 256
+
+# 数据版本：本进程内每次写库加一；外部改库（如 init_db.py）通过文件修改时间识别
+_data_version = 0
+_pivot_cache: dict = {}
+_pivot_lock = threading.Lock()
+
 def get_db_connection():
     """获取数据库连接"""
-    conn = sqlite3.connect('fcra_data.db')
+    conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -27,6 +81,93 @@ def _parse_process_date(date_str: str) -> datetime | None:
     except Exception:
         return None
 
+def _dumps(payload) -> bytes:
+    """快速JSON编码：优先使用orjson，否则使用紧凑分隔符的标准库json。"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _fast_jsonify(payload):
+    """与jsonify等价的响应，但走_dumps编码路径。"""
+    return app.response_class(_dumps(payload), mimetype='application/json')
+
+def _wants_columnar() -> bool:
+    """请求参数 format=columnar 时返回列式紧凑格式（需显式开启）。"""
+    return request.args.get('format', '') == 'columnar'
+
+def _to_columnar(records: list[dict], columns: list[str]) -> dict:
+    """将行列表转为列式结构：列名只出现一次，分类列做字典编码。
+
+    返回: { format: 'columnar', columns: [...], length: N,
+            data: [[第一列值...], [第二列值...], ...],
+            dictionaries: { 分类列名: [取值...] } }
+    分类列在 data 中存放的是 dictionaries 中对应取值的下标。
+    """
+    data = []
+    dictionaries = {}
+    for col in columns:
+        values = [rec[col] for rec in records]
+        if col in CATEGORICAL_COLUMNS:
+            codes = {}
+            encoded = []
+            for v in values:
+                code = codes.get(v)
+                if code is None:
+                    code = codes[v] = len(codes)
+                encoded.append(code)
+            dictionaries[col] = list(codes)
+            values = encoded
+        data.append(values)
+    return {
+        'format': 'columnar',
+        'columns': columns,
+        'length': len(records),
+        'data': data,
+        'dictionaries': dictionaries
+    }
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    """按 Content-Encoding 压缩响应体（HTTP的deflate即zlib格式）。"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return zlib.compress(body, 6)
+
+@app.after_request
+def compress_response(response):
+    """根据 Accept-Encoding 对JSON响应做 gzip/deflate 压缩。"""
+    if (response.direct_passthrough
+            or response.mimetype != 'application/json'
+            or not 200 <= response.status_code < 300
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(['gzip', 'deflate'])
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(_compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def _bump_data_version():
+    """写库后调用，使依赖数据版本的缓存失效。"""
+    global _data_version
+    with _pivot_lock:
+        _data_version += 1
+
+def _current_data_version() -> tuple:
+    """当前数据版本：(进程内写入计数, 数据库文件修改时间)。"""
+    try:
+        mtime = os.stat(DB_PATH).st_mtime_ns
+    except OSError:
+        mtime = 0
+    return (_data_version, mtime)
+
 @app.route('/')
 def index():
     """主页"""
@@ -235,6 +376,9 @@ def get_trend():
       - remediation: remediation_status = 'Incomplete'
       - lob: remediation_status = 'Incomplete' AND remediation_category = 'LOB engagement'
     返回: { labels: [YYYY-MM...], series: { 'Credit Cards': [...], 'TDAF': [...], 'Consumer': [...] } }
+
+    参数 format=columnar 时返回:
+      { format: 'columnar', labels: [...], columns: [portfolio...], data: [[...], ...] }
     """
     metric = request.args.get('metric', 'instances')
     conn = get_db_connection()
@@ -286,6 +430,14 @@ def get_trend():
             if rec['status'] == 'Incomplete' and rec['category'] == 'LOB engagement':
                 series[key][i] += 1
 
+    if _wants_columnar():
+        return _fast_jsonify({
+            'format': 'columnar',
+            'labels': labels,
+            'columns': list(series),
+            'data': list(series.values())
+        })
+
     return jsonify({ 'labels': labels, 'series': series })
 
 @app.route('/api/portfolio_stats/<portfolio>')
@@ -364,7 +516,10 @@ def get_portfolio_stats(portfolio):
 
 @app.route('/api/portfolio_data/<portfolio>')
 def get_portfolio_data(portfolio):
-    """获取特定Portfolio的表格数据"""
+    """获取特定Portfolio的表格数据
+
+    默认返回行格式（每行一个dict）；参数 format=columnar 时返回列式紧凑格式，见 _to_columnar。
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -416,6 +571,9 @@ def get_portfolio_data(portfolio):
             'remediation_category': row['remediation_category'] or ''
         })
     
+    if _wants_columnar():
+        return _fast_jsonify(_to_columnar(data, PORTFOLIO_DATA_COLUMNS))
+
     return jsonify(data)
 
 @app.route('/api/update_record', methods=['POST'])
@@ -446,6 +604,7 @@ def update_record():
     
     conn.commit()
     conn.close()
+    _bump_data_version()
     
     return jsonify({'success': True})
 
@@ -499,6 +658,126 @@ def get_incomplete_count(assignee):
     
     return jsonify({'count': count})
 
+def _compile_pivot_query(dims: list[str], filters: dict, measure: str, limit: int) -> tuple[str, list]:
+    """将维度/过滤/度量编译为一条参数化的聚合SQL。
+
+    维度和度量只能来自白名单，过滤值全部走参数绑定。多取一行用于判断是否截断。
+    维度按 COALESCE(维度, '') 分组，NULL 与 '' 合并为同一个空白分组；
+    相应地过滤值 '' 同时匹配 NULL 和 ''。索引用于过滤条件。
+    """
+    dim_exprs = [f"COALESCE({dim}, '')" for dim in dims]
+    select_cols = ', '.join(f'{expr} AS {dim}' for expr, dim in zip(dim_exprs, dims))
+    group_cols = ', '.join(dim_exprs)
+    query = f'SELECT {select_cols}, {PIVOT_MEASURES[measure]} AS value FROM fcra_records'
+    params = []
+    clauses = []
+    for dim, values in filters.items():
+        placeholders = ', '.join('?' for _ in values)
+        clause = f'{dim} IN ({placeholders})'
+        if '' in values:
+            clause = f'({clause} OR {dim} IS NULL)'
+        clauses.append(clause)
+        params.extend(values)
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += f' GROUP BY {group_cols} ORDER BY value DESC, {group_cols} LIMIT ?'
+    params.append(limit + 1)
+    return query, params
+
+def _run_pivot_query(query: str, params: list) -> list[sqlite3.Row]:
+    """执行透视查询，超过 PIVOT_TIMEOUT_SECONDS 时由SQLite中断并抛出 OperationalError。"""
+    conn = get_db_connection()
+    try:
+        deadline = time.monotonic() + PIVOT_TIMEOUT_SECONDS
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+@app.route('/api/pivot')
+def get_pivot():
+    """通用透视/下钻接口。
+
+    参数:
+      - dims: 逗号分隔的分组维度，最多3个，取值见 PIVOT_DIMENSIONS
+      - measure: count | exceptions | incomplete | ninety_days（默认 count）
+      - <维度名>: 过滤条件，可重复传入表示多选，如 portfolio=TDAF&severity=High&severity=Medium；
+        传空值（如 assigned_to=）表示筛选空白分组
+      - limit: 返回行数上限（默认500，最大5000）
+      - format=columnar: 返回列式紧凑格式
+    返回: { dims: [...], measure: ..., rows: [{<维度>..., value: n}], truncated: bool }
+    """
+    dims = [d.strip() for d in request.args.get('dims', '').split(',') if d.strip()]
+    measure = request.args.get('measure', 'count')
+
+    if not dims:
+        return jsonify({'error': 'dims is required'}), 400
+    if len(dims) > PIVOT_MAX_DIMENSIONS:
+        return jsonify({'error': f'at most {PIVOT_MAX_DIMENSIONS} dims are allowed'}), 400
+    if len(set(dims)) != len(dims):
+        return jsonify({'error': 'dims must not repeat'}), 400
+    invalid = [d for d in dims if d not in PIVOT_DIMENSIONS]
+    if invalid:
+        return jsonify({'error': f'unsupported dims: {", ".join(invalid)}'}), 400
+    if measure not in PIVOT_MEASURES:
+        return jsonify({'error': f'unsupported measure: {measure}'}), 400
+    try:
+        limit = int(request.args.get('limit', PIVOT_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, PIVOT_MAX_LIMIT))
+
+    filters = {}
+    for dim in PIVOT_DIMENSIONS:
+        values = request.args.getlist(dim)
+        if not values:
+            continue
+        if dim == 'portfolio':
+            # 调整portfolio名称以匹配数据库
+            values = ['Consumers' if v == 'Consumer' else v for v in values]
+        filters[dim] = sorted(set(values))
+
+    query, params = _compile_pivot_query(dims, filters, measure, limit)
+    key = (tuple(dims), tuple((d, tuple(v)) for d, v in filters.items()), measure, limit)
+    version = _current_data_version()
+
+    with _pivot_lock:
+        cached = _pivot_cache.get(key)
+    if cached is not None and cached[0] == version:
+        result = cached[1]
+    else:
+        try:
+            rows = _run_pivot_query(query, params)
+        except sqlite3.OperationalError as e:
+            if 'interrupted' in str(e):
+                return jsonify({'error': 'pivot query timed out'}), 503
+            raise
+
+        data = []
+        for row in rows[:limit]:
+            rec = {dim: row[dim] for dim in dims}
+            if rec.get('portfolio') == 'Consumers':
+                rec['portfolio'] = 'Consumer'
+            rec['value'] = row['value'] or 0
+            data.append(rec)
+        result = {
+            'dims': dims,
+            'measure': measure,
+            'rows': data,
+            'truncated': len(rows) > limit
+        }
+        with _pivot_lock:
+            if len(_pivot_cache) >= PIVOT_CACHE_SIZE:
+                _pivot_cache.clear()
+            _pivot_cache[key] = (version, result)
+
+    if _wants_columnar():
+        payload = _to_columnar(result['rows'], dims + ['value'])
+        payload.update(dims=dims, measure=measure, truncated=result['truncated'])
+        return _fast_jsonify(payload)
+
+    return jsonify(result)
+
 @app.route('/api/export/<portfolio>')
 def export_data(portfolio):
     """导出数据到Excel"""
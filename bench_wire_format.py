@@ -0,0 +1,61 @@
+"""对比 portfolio_data 行格式与列式紧凑格式的载荷大小和编码耗时。
+
+用法: python bench_wire_format.py [行数]
+数据取自 fcra_data.db，不足指定行数时循环复制。
+"""
+import gzip
+import sys
+import time
+import zlib
+
+from app import PORTFOLIO_DATA_COLUMNS, _dumps, _to_columnar, app, get_db_connection
+
+
+def load_records(n: int) -> list[dict]:
+    """读取数据库记录并扩充到 n 行（与 /api/portfolio_data 行格式一致）。"""
+    conn = get_db_connection()
+    rows = conn.execute('SELECT * FROM fcra_records ORDER BY id').fetchall()
+    conn.close()
+    base = [{col: (row[col] if row[col] is not None else '') for col in PORTFOLIO_DATA_COLUMNS} for row in rows]
+    records = []
+    while base and len(records) < n:
+        for rec in base:
+            rec = dict(rec, id=len(records) + 1)
+            records.append(rec)
+            if len(records) >= n:
+                break
+    return records
+
+
+def timed(fn, repeat: int = 20) -> float:
+    """返回 fn 最快一次的耗时（毫秒）。"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    records = load_records(n)
+
+    cases = [
+        # 基线即当前线上格式：jsonify 实际输出的响应体（紧凑分隔符、键排序）
+        ('rows / jsonify', lambda: app.json.response(records).get_data()),
+        ('rows / fast', lambda: _dumps(records)),
+        ('columnar / fast', lambda: _dumps(_to_columnar(records, PORTFOLIO_DATA_COLUMNS))),
+    ]
+
+    print(f'rows: {len(records)}')
+    print(f"{'format':<18}{'encode ms':>12}{'raw bytes':>14}{'gzip bytes':>14}{'deflate bytes':>16}")
+    with app.app_context():
+        for name, fn in cases:
+            body = fn()
+            print(f'{name:<18}{timed(fn):>12.2f}{len(body):>14}'
+                  f'{len(gzip.compress(body, compresslevel=6)):>14}{len(zlib.compress(body, 6)):>16}')
+
+
+if __name__ == '__main__':
+    main()
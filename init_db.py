@@ -2,6 +2,21 @@ import sqlite3
 import csv
 from datetime import datetime
 
+# 透视/下钻查询使用的索引：单列索引用于单个维度的过滤，
+# 组合索引用于常用下钻路径上的多条件过滤（portfolio × 状态 × 分类、portfolio × 规则 × 严重度、portfolio × 负责人）
+INDEX_STATEMENTS = [
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_rule_id ON fcra_records (rule_id)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_rule_category ON fcra_records (rule_category)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_severity ON fcra_records (severity)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_dqs_status ON fcra_records (dqs_status)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_remediation_status ON fcra_records (remediation_status)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_remediation_category ON fcra_records (remediation_category)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_assigned_to ON fcra_records (assigned_to)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_portfolio_status_category ON fcra_records (portfolio, remediation_status, remediation_category)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_portfolio_rule_severity ON fcra_records (portfolio, rule_id, severity)',
+    'CREATE INDEX IF NOT EXISTS idx_fcra_records_portfolio_assignee ON fcra_records (portfolio, assigned_to)',
+]
+
 def init_database():
     """初始化数据库并导入CSV数据"""
     conn = sqlite3.connect('fcra_data.db')
@@ -28,6 +43,8 @@ def init_database():
             remediation_category TEXT
         )
     ''')
+    for stmt in INDEX_STATEMENTS:
+        cursor.execute(stmt)
     
     # 清空现有数据
     cursor.execute('DELETE FROM fcra_records')
@@ -72,6 +89,8 @@ def init_database():
                 print(f"导入数据时出错: {e}")
                 print(f"问题行: {row}")
     
+    # 按重新导入后的数据刷新查询规划统计（sqlite_stat1），避免沿用旧数据的统计
+    cursor.execute('ANALYZE')
     conn.commit()
     
     # 验证数据
@@ -84,6 +103,17 @@ def init_database():
     print(f"成功导入 {count} 条记录")
     print(f"数据库中共有 {total} 条记录")
 
+def create_indexes():
+    """为已有数据库补建索引（不重新导入数据），用于旧库一次性迁移。"""
+    conn = sqlite3.connect('fcra_data.db')
+    cursor = conn.cursor()
+    for stmt in INDEX_STATEMENTS:
+        cursor.execute(stmt)
+    cursor.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    print('索引创建完成，共', len(INDEX_STATEMENTS), '个。')
+
 def seed_more_data():
     """在现有数据库中插入不同process_date的示例数据，便于演示趋势与As Of日期。"""
     conn = sqlite3.connect('fcra_data.db')